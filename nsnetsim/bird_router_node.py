@@ -19,7 +19,9 @@
 """BIRD router support."""
 
 import contextlib
+import functools
 import os
+import re
 import shutil
 import signal
 import subprocess  # nosec
@@ -32,6 +34,25 @@ from .router_node import RouterNode
 
 __all__ = ["BirdRouterNode"]
 
+# Matches an 'include' statement in a BIRD config file
+_INCLUDE_RE = re.compile(r"^\s*include\b", re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=32)
+def _validate_config(configfile: str, mtime_ns: int, size: int) -> None:  # pylint: disable=unused-argument
+    """
+    Validate a BIRD config file, results are cached by the file modification time and size so we only run BIRD once per file.
+
+    The path should be absolute so the cache still matches after a directory change. Files the config includes are not
+    tracked, so configs using 'include' should be validated using _validate_config.__wrapped__() to bypass the cache.
+    """
+    try:
+        subprocess.run(  # nosec
+            ["bird", "-c", configfile, "-p"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=True, text=True
+        )
+    except subprocess.CalledProcessError as err:  # pragma: no cover
+        raise NsNetSimError(f"Failed to validate BIRD config file '{configfile}': {err.stdout}") from None
+
 
 class BirdRouterNode(RouterNode):
     """BirdRouterNode implements a network isolated BIRD router node."""
@@ -46,7 +67,7 @@ class BirdRouterNode(RouterNode):
     def _init(self, **kwargs: Any) -> None:
         """Initialize the object."""
         # Call parent create
-        super()._init()
+        super()._init(**kwargs)
 
         # Make sure bird path is returned by which
         if not shutil.which("bird"):
@@ -70,11 +91,12 @@ class BirdRouterNode(RouterNode):
 
         self._pidfile = f"{self._rundir}/bird.pid"
 
-        # Test config file
-        try:
-            self.run_check_call(["bird", "-c", self._configfile, "-p"])  # nosec
-        except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f"Failed to validate BIRD config file '{self._configfile}': {err.stdout}") from None
+        # Test config file, bypassing the cache if it includes other files as changes to them would not be picked up
+        configfile = os.path.abspath(self._configfile)
+        configfile_stat = os.stat(configfile)
+        with open(configfile, encoding="UTF-8") as file:
+            validate_config = _validate_config.__wrapped__ if _INCLUDE_RE.search(file.read()) else _validate_config
+        validate_config(configfile, configfile_stat.st_mtime_ns, configfile_stat.st_size)
 
     # Send something to birdc
     def birdc(self, query: str) -> List[str]:
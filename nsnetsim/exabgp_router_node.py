@@ -51,7 +51,7 @@ class ExaBGPRouterNode(RouterNode):
     def _init(self, **kwargs: Any) -> None:
         """Initialize the object."""
         # Call parent create
-        super()._init()
+        super()._init(**kwargs)
 
         # Make sure exabgp path is returned by which
         if not shutil.which("exabgp"):
@@ -19,8 +19,9 @@
 """Generic node support."""
 
 import logging
+import os
 import subprocess  # nosec
-from typing import Any, List
+from typing import Any, ClassVar, List
 
 __all__ = ["GenericNode"]
 
@@ -28,6 +29,9 @@ __all__ = ["GenericNode"]
 class GenericNode:
     """GenericNode implements a generic topology node."""
 
+    # Kind of node, this is set by each type of node so we can group nodes without type checks
+    NODE_KIND: ClassVar[str] = "generic"
+
     # Name of the node
     _name: str
     # Extra logging info
@@ -70,6 +74,14 @@ class GenericNode:
         """Run command inside the namespace similar to check_call."""
         return subprocess.run(args, capture_output=True, check=True, text=True, **kwargs)  # nosec
 
+    def _sysctl_write(self, path: str, value: str) -> None:
+        """Write a value to a /proc/sys file using a single unbuffered write."""
+        filefd = os.open(path, os.O_WRONLY)
+        try:
+            os.write(filefd, value.encode("UTF-8"))
+        finally:
+            os.close(filefd)
+
     @property
     def name(self) -> str:
         """Return the node name."""
@@ -21,9 +21,10 @@
 import ipaddress
 import random
 import secrets
+import socket
 import subprocess  # nosec
 import time
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, List, Optional, Tuple, Union
 
 from .exceptions import NsNetSimError
 from .generic_node import GenericNode
@@ -35,18 +36,22 @@ if TYPE_CHECKING:  # pragma: no cover
 __all__ = ["NamespaceNetworkInterface"]
 
 
-class NamespaceNetworkInterface(GenericNode):
+class NamespaceNetworkInterface(GenericNode):  # pylint: disable=too-many-instance-attributes
     """NamespaceInterface implements a network interface within a NamespaceNode."""
 
+    NODE_KIND: ClassVar[str] = "interface"
+
     # Namespace we're linked to
     _namespace_node: "NamespaceNode"
     # Name of the interfaces we've created
     _ifname_host: str
+    # Interface index of the host-side interface
+    _host_ifindex: int
     # Interface mac address
     _mac_address: str
     _settings: Dict[str, Any]
-    # IP's for interface
-    _ip_addresses: List[str]
+    # IP's for interface, along with their IP version and IPv4 broadcast address
+    _ip_addresses: List[Tuple[str, int, Optional[str]]]
     # Indication if the interface was created
     _created: bool
 
@@ -64,17 +69,12 @@ class NamespaceNetworkInterface(GenericNode):
 
         # Set the namespace name we're going to use
         self._ifname_host = f"veth-{secrets.token_hex(4)}"
+        self._host_ifindex = 0
 
         # Assign an interface mac address
         mac_address: Optional[str] = kwargs.get("mac")
         if not mac_address:
-            mac_address = "".join(
-                [
-                    f"02:{random.randint(0, 255):02x}:",  # nosec
-                    f"{random.randint(0, 255):02x}:{random.randint(0, 255):02x}:",  # nosec
-                    f"{random.randint(0, 255):02x}:{random.randint(0, 255):02x}",  # nosec
-                ]
-            )
+            mac_address = "02:" + random.randbytes(5).hex(":")  # nosec
         self._mac_address = mac_address
 
         self._settings = {
@@ -82,7 +82,12 @@ class NamespaceNetworkInterface(GenericNode):
             "ipv6_dad": kwargs.get("ipv6_dad", 0),
             # Disable IPv6 RA by default
             "ipv6_ra": kwargs.get("ipv6_ra", 0),
+            # Initial delay between IPv6 DAD checks, this doubles on each check up to 0.1s
+            "ipv6_dad_initial_delay": kwargs.get("ipv6_dad_initial_delay", 0.01),
         }
+        # A delay of zero would never back off and we'd run checks back to back until we time out
+        if self.ipv6_dad_initial_delay <= 0:
+            raise NsNetSimError(f"IPv6 DAD initial delay must be greater than 0, got {self.ipv6_dad_initial_delay}")
 
         # Start with a clean list of IP's
         self._ip_addresses = []
@@ -90,10 +95,10 @@ class NamespaceNetworkInterface(GenericNode):
         # Indicate the interface has not yet been created
         self._created = False
 
-    def _create(self) -> None:  # noqa: CFQ001 # pylint: disable=too-many-branches,too-many-statements
+    def _create(self) -> None:  # noqa: CFQ001 # pylint: disable=too-many-branches,too-many-locals,too-many-statements
         """Create the interface."""
 
-        # Create the interface pair
+        # Create the interface pair, setting the namespace-side MAC address at the same time
         retry = 5
         error = ""
         while retry > 0:
@@ -110,6 +115,8 @@ class NamespaceNetworkInterface(GenericNode):
                         "veth",
                         "peer",
                         self.ifname,
+                        "address",
+                        self._mac_address,
                     ]
                 )
                 break
@@ -129,22 +136,20 @@ class NamespaceNetworkInterface(GenericNode):
         # Indicate the interface has been created
         self._created = True
 
-        # Set MAC address
+        # Grab the host-side interface index once, so switches don't need to look it up
         try:
-            self.namespace_node.run_in_ns_check_call(["/usr/bin/ip", "link", "set", self.ifname, "address", self._mac_address])
-        except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f'Failed to set MAC address for "{self.name}" interface "{self.ifname}": {err.stdout}') from None
+            self._host_ifindex = socket.if_nametoindex(self.ifname_host)
+        except OSError as err:  # pragma: no cover
+            raise NsNetSimError(f"Failed to get interface index for '{self.ifname_host}': {err}") from None
 
         # Disable host IPv6 DAD
         try:
-            with open(f"/proc/sys/net/ipv6/conf/{self.ifname_host}/accept_dad", "w", encoding="UTF-8") as ipv6_dad_file:
-                ipv6_dad_file.write("0")
+            self._sysctl_write(f"/proc/sys/net/ipv6/conf/{self.ifname_host}/accept_dad", "0")
         except OSError as err:  # pragma: no cover
             raise NsNetSimError(f"Failed to set host 'accept_dad' to 0: {err}") from None
         # Disable host IPv6 RA
         try:
-            with open(f"/proc/sys/net/ipv6/conf/{self.ifname_host}/accept_ra", "w", encoding="UTF-8") as ipv6_ra_file:
-                ipv6_ra_file.write("0")
+            self._sysctl_write(f"/proc/sys/net/ipv6/conf/{self.ifname_host}/accept_ra", "0")
         except OSError as err:  # pragma: no cover
             raise NsNetSimError(f"Failed to set host 'accept_ra' to 0: {err}") from None
 
@@ -152,110 +157,75 @@ class NamespaceNetworkInterface(GenericNode):
         with NetNS(nsname=self.namespace_node.namespace):
             # Disable namespace IPv6 DAD
             try:
-                with open(f"/proc/sys/net/ipv6/conf/{self.ifname}/accept_dad", "w", encoding="UTF-8") as ipv6_dad_file:
-                    ipv6_dad_file.write(f"{self.ipv6_dad}")
+                self._sysctl_write(f"/proc/sys/net/ipv6/conf/{self.ifname}/accept_dad", f"{self.ipv6_dad}")
             except OSError as err:  # pragma: no cover
                 raise NsNetSimError(f"Failed to set namespace 'accept_dad' to {self.ipv6_dad}: {err}") from None
             # Disable namespace IPv6 RA
             try:
-                with open(f"/proc/sys/net/ipv6/conf/{self.ifname}/accept_ra", "w", encoding="UTF-8") as ipv6_ra_file:
-                    ipv6_ra_file.write(f"{self.ipv6_ra}")
+                self._sysctl_write(f"/proc/sys/net/ipv6/conf/{self.ifname}/accept_ra", f"{self.ipv6_ra}")
             except OSError as err:  # pragma: no cover
                 raise NsNetSimError(f"Failed to set namespace 'accept_dad' to {self.ipv6_ra}: {err}") from None
 
         # Add ip's to the namespace interface
         has_ipv6 = False
-        for ip_address_raw in self.ip_addresses:
-            args = ["/usr/bin/ip", "address", "add", ip_address_raw, "dev", self.ifname]
+        batch = []
+        for ip_address_raw, ip_version, broadcast_address in self._ip_addresses:
+            command = f"address add {ip_address_raw} dev {self.ifname}"
 
-            ip_address = ipaddress.ip_network(ip_address_raw, strict=False)
             # Check if we need to add a broadcast address for IPv4
-            if (ip_address.version == 4) and (ip_address.prefixlen < 31):
-                args.extend(["broadcast", f"{ip_address.broadcast_address}"])
-            if ip_address.version == 6:
+            if broadcast_address:
+                command += f" broadcast {broadcast_address}"
+            if ip_version == 6:
                 has_ipv6 = True
 
-            # Set interface up on namespace side
-            try:
-                self.namespace_node.run_in_ns_check_call(args)
-            except subprocess.CalledProcessError as err:  # pragma: no cover
-                raise NsNetSimError(
-                    f"Failed to add IP address for '{self.name}'' interface '{self.ifname}' IP '{ip_address_raw}': {err.stdout}"
-                ) from None
+            batch.append(command)
 
         # Set interface up on host side
         try:
             self.run_check_call(["/usr/bin/ip", "link", "set", self.ifname_host, "up"])
         except subprocess.CalledProcessError as err:  # pragma: no cover
             raise NsNetSimError(f"Failed to set host interface '{self.ifname_host}' up: {err.stdout}") from None
-        # Set interface up on namespace side
+        # Add the IP's and set interface up on namespace side, all using a single 'ip -batch' run
+        batch.append(f"link set {self.ifname} up")
         try:
-            self.namespace_node.run_in_ns_check_call(["/usr/bin/ip", "link", "set", self.ifname, "up"])
+            self.run_check_call(
+                ["/usr/bin/ip", "-netns", self.namespace_node.namespace, "-batch", "-"], input="\n".join(batch) + "\n"
+            )
         except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f"Failed to set namespace interface '{self.ifname}' up: {err.stdout}") from None
+            raise NsNetSimError(
+                f"Failed to add IP addresses and set namespace interface '{self.ifname}' up for '{self.name}': {err.stdout}"
+            ) from None
 
         # We need to wait until the interface IPv6 is up
         if has_ipv6:
-            attempts = 60
+            delay = self.ipv6_dad_initial_delay
+            deadline = time.monotonic() + 6
             has_ll6 = False
             has_addr = False
-            while attempts > 0:
-                # We either need a site or global address
-                if not has_addr:
-                    try:
-                        result = self.namespace_node.run_in_ns_check_output(
-                            ["/usr/bin/ip", "-6", "-oneline", "address", "show", "dev", self.ifname, "scope", "site", "-tentative"],
-                        )
-                    except subprocess.CalledProcessError as err:  # pragma: no cover
-                        raise NsNetSimError(f"Failed to get site scoped tentative addresses: {err.stderr}") from None
-                    # Check if we have output
-                    if result.stdout:  # pragma: no cover
-                        has_addr = True
-                        continue
-
-                    try:
-                        result = self.namespace_node.run_in_ns_check_output(
-                            [
-                                "/usr/bin/ip",
-                                "-6",
-                                "-oneline",
-                                "address",
-                                "show",
-                                "dev",
-                                self.ifname,
-                                "scope",
-                                "global",
-                                "-tentative",
-                            ],
-                        )
-                    except subprocess.CalledProcessError as err:  # pragma: no cover
-                        raise NsNetSimError(f"Failed to get global scoped tentative addresses: {err.stderr}") from None
-                    # Check if we have output
-                    if result.stdout:
-                        has_addr = True
-
-                # We need a link local address not in the tentative state
-                if not has_ll6:
-                    try:
-                        result = self.namespace_node.run_in_ns_check_output(
-                            ["/usr/bin/ip", "-6", "-oneline", "address", "show", "dev", self.ifname, "scope", "link", "-tentative"]
-                        )
-                    except subprocess.CalledProcessError as err:  # pragma: no cover
-                        raise NsNetSimError(f"Failed to get link scoped tentative addresses: {err.stderr}") from None
-                    # Check if we have output
-                    if result.stdout:  # pragma: no cover
-                        has_ll6 = True
+            while time.monotonic() < deadline:
+                # Grab all the IPv6 addresses on the interface in one go and check their scope
+                for link in self.namespace_node.run_ip(["-6", "address", "show", "dev", self.ifname]) or []:
+                    for addr_info in link.get("addr_info", []):
+                        # Skip over addresses that are still tentative
+                        if addr_info.get("tentative"):
+                            continue
+                        # We either need a site or global address
+                        if addr_info.get("scope") in ("site", "global"):
+                            has_addr = True
+                        # We need a link local address not in the tentative state
+                        elif addr_info.get("scope") == "link":
+                            has_ll6 = True
 
                 # If we have both, break
                 if has_ll6 and has_addr:  # pragma: no cover
                     break
 
-                # Sleep 0.1 second
-                time.sleep(0.1)  # pragma: no cover
-                attempts = attempts - 1  # pragma: no cover
+                # Back off exponentially, DAD normally completes quickly so we start with a short delay
+                time.sleep(delay)  # pragma: no cover
+                delay = min(delay * 2, 0.1)  # pragma: no cover
 
             # Throw a runtime exception if we didn't manage to get a our addresses
-            if attempts == 0:  # pragma: no cover
+            if not (has_ll6 and has_addr):  # pragma: no cover
                 try:
                     result = self.namespace_node.run_in_ns_check_call(
                         ["/usr/bin/ip", "-details", "-6", "address", "show", "dev", self.ifname]
@@ -280,13 +250,23 @@ class NamespaceNetworkInterface(GenericNode):
                 raise NsNetSimError(f"Failed to remove veth '{self.ifname_host}' from host: {err.stdout}") from None
             # Indicate that the interface is no longer created
             self._created = False
+            self._host_ifindex = 0
 
     def add_ip(self, ip_address: Union[str, List[str]]) -> None:
         """Add IP to the namespace interface."""
-        if isinstance(ip_address, list):
-            self._ip_addresses.extend(ip_address)
-        else:
-            self._ip_addresses.append(ip_address)
+        ip_addresses = ip_address if isinstance(ip_address, list) else [ip_address]
+
+        # Parse the IP's now so we only do it once
+        for ip_address_raw in ip_addresses:
+            try:
+                ip_network = ipaddress.ip_network(ip_address_raw, strict=False)
+            except ValueError as err:
+                raise NsNetSimError(f"Invalid IP address '{ip_address_raw}' for interface '{self.ifname}': {err}") from None
+            # Work out the broadcast address for IPv4 networks that have one
+            broadcast_address = None
+            if (ip_network.version == 4) and (ip_network.prefixlen < 31):
+                broadcast_address = f"{ip_network.broadcast_address}"
+            self._ip_addresses.append((ip_address_raw, ip_network.version, broadcast_address))
 
     @property
     def namespace_node(self) -> "NamespaceNode":
@@ -303,6 +283,11 @@ class NamespaceNetworkInterface(GenericNode):
         """Return the host-side interface name."""
         return self._ifname_host
 
+    @property
+    def host_ifindex(self) -> int:
+        """Return the host-side interface index, this is 0 if the interface has not been created."""
+        return self._host_ifindex
+
     @property
     def ipv6_dad(self) -> int:
         """Return the interfaces IPv6 DAD attribute."""
@@ -313,7 +298,12 @@ class NamespaceNetworkInterface(GenericNode):
         """Return the interfaces IPv6 RA attribute."""
         return int(self._settings["ipv6_ra"])
 
+    @property
+    def ipv6_dad_initial_delay(self) -> float:
+        """Return the initial delay between IPv6 DAD checks."""
+        return float(self._settings["ipv6_dad_initial_delay"])
+
     @property
     def ip_addresses(self) -> List[str]:
         """Return the IP addresses for the interface."""
-        return self._ip_addresses
+        return [ip_address for ip_address, _, _ in self._ip_addresses]
@@ -18,16 +18,24 @@
 
 """Namespace node support."""
 
+import concurrent.futures
+import contextlib
 import json
 import os
+import re
+import select
+import shutil
+import signal
 import subprocess  # nosec
 import uuid
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Set, Union
 
 from .exceptions import NsNetSimError
 from .generic_node import GenericNode
 from .namespace_network_interface import NamespaceNetworkInterface
-from .netns import NetNS
+from .netlink import NetlinkError
+from .netlink import list_routes as netlink_list_routes
+from .netns import NamespacePool, NetNS
 
 __all__ = ["NamespaceNode"]
 
@@ -35,8 +43,12 @@ __all__ = ["NamespaceNode"]
 class NamespaceNode(GenericNode):
     """NamespaceNode implements the basic network namespace isolation we need for nodes."""
 
+    NODE_KIND: ClassVar[str] = "namespace"
+
     # Name of the namespace we've created
     _namespace: str
+    # Pool of pre-created namespaces
+    _namespace_pool: Optional[NamespacePool]
     # Interfaces we've added to the namespace
     _interfaces: Dict[str, NamespaceNetworkInterface]
     # Create a run dir
@@ -46,12 +58,13 @@ class NamespaceNode(GenericNode):
     # Indication the namespace was created
     _created: bool
 
-    def _init(self, **kwargs: Any) -> None:  # pylint: disable=unused-argument
+    def _init(self, **kwargs: Any) -> None:
         """Initialize the object."""
 
         self._extra_log = ""
 
-        # Set the namespace name we're going to use
+        # Set the namespace name we're going to use, with a pool this is replaced by a pre-created one when we're created
+        self._namespace_pool = kwargs.get("namespace_pool")
         self._namespace = str(uuid.uuid4())
 
         # Start with a clean list of interfaces
@@ -65,7 +78,7 @@ class NamespaceNode(GenericNode):
             except OSError as err:  # pragma: no cover
                 raise NsNetSimError(f"Failed to create run directory '{self._rundir}': {err}") from None
 
-        # Indicate the namespace has not been created yet
+        # Indicate the namespace has not yet been created
         self._created = False
 
         # Start with no routes
@@ -74,46 +87,55 @@ class NamespaceNode(GenericNode):
     def _create(self) -> None:
         """Create the namespace."""
 
-        # Create namespace
-        try:
-            self.run_check_call(["/usr/bin/ip", "netns", "add", self.namespace])  # nosec
-        except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f"Failed to add network namespace '{self.namespace}': {err.stdout}") from None
-        self._created = True
+        # Grab a pre-created namespace from the pool if one is ready, nodes that are never created then don't hold one
+        if self._namespace_pool:
+            pooled_namespace = self._namespace_pool.get()
+            if pooled_namespace:
+                self._namespace = pooled_namespace
+                self._created = True
 
-        # Bring the lo interface up
-        try:
-            self.run_in_ns_check_call(["/usr/bin/ip", "link", "set", "lo", "up"])
-        except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f"Failed to bring device 'lo' up in namespace '{self.namespace}': {err.stdout}") from None
+        # Create namespace if we didn't get a pre-created one from the pool
+        if not self._created:
+            try:
+                self.run_check_call(["/usr/bin/ip", "netns", "add", self.namespace])  # nosec
+            except subprocess.CalledProcessError as err:  # pragma: no cover
+                raise NsNetSimError(f"Failed to add network namespace '{self.namespace}': {err.stdout}") from None
+            self._created = True
 
-        # Create interfaces
-        for _, interface in self._interfaces.items():
-            # Create interface
-            interface.create()
+        # Create interfaces, this is mostly spent waiting on subprocesses and the kernel, so we create them concurrently
+        if self._interfaces:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(16, len(self._interfaces))) as executor:
+                futures = [executor.submit(interface.create) for interface in self._interfaces.values()]
+            # Re-raise the first exception we got
+            for future in futures:
+                future.result()
 
         # Drop into namespace
         with NetNS(nsname=self.namespace):
             # Enable forwarding
             try:
-                with open("/proc/sys/net/ipv4/conf/all/forwarding", "w", encoding="UTF-8") as forwarding_file:
-                    forwarding_file.write("1")
+                self._sysctl_write("/proc/sys/net/ipv4/conf/all/forwarding", "1")
             except OSError as err:  # pragma: no cover
                 raise NsNetSimError(f"Failed to enable IPv4 forwarding in network namespace '{self.namespace}': {err}") from None
             try:
-                with open("/proc/sys/net/ipv6/conf/all/forwarding", "w", encoding="UTF-8") as forwarding_file:
-                    forwarding_file.write("1")
+                self._sysctl_write("/proc/sys/net/ipv6/conf/all/forwarding", "1")
             except OSError as err:  # pragma: no cover
                 raise NsNetSimError(f"Failed to enable IPv6 forwarding in network namespace '{self.namespace}': {err}") from None
 
-        # Add routes to the namespace
-        for route in self._routes:
-            route_args = ["/usr/bin/ip", "route", "add"]
-            route_args.extend(route)
-            try:
-                self.run_in_ns_check_call(route_args)
-            except subprocess.CalledProcessError as err:  # pragma: no cover
-                raise NsNetSimError(f"Failed to add route '{route}' to namespace '{self.namespace}': {err.stdout}") from None
+        # Bring the lo interface up and add routes to the namespace, all using a single 'ip -batch' run
+        batch = ["link set lo up"]
+        batch.extend(f"route add {' '.join(route)}" for route in self._routes)
+        try:
+            self.run_check_call(["/usr/bin/ip", "-netns", self.namespace, "-batch", "-"], input="\n".join(batch) + "\n")
+        except subprocess.CalledProcessError as err:
+            # 'ip' reports the failing line as "Command failed -:<line>", map it back to the command we gave it
+            failed = re.search(r"^Command failed -:(\d+)$", err.stdout or "", re.MULTILINE)
+            if failed and 0 < int(failed.group(1)) <= len(batch):
+                command = batch[int(failed.group(1)) - 1]
+                raise NsNetSimError(f"Failed to run 'ip {command}' in namespace '{self.namespace}': {err.stdout}") from None
+            raise NsNetSimError(  # pragma: no cover
+                f"Failed to bring device 'lo' up and add routes to namespace '{self.namespace}': {err.stdout}"
+            ) from None
 
     def _remove(self) -> None:
         """Remove the namespace."""
@@ -122,6 +144,10 @@ class NamespaceNode(GenericNode):
         for _, interface in self._interfaces.items():
             interface.remove()
 
+        # Return the namespace to the pool if we have one, if it could not be cleaned up it is removed below instead
+        if self._created and self._namespace_pool and self._release_namespace():
+            self._created = False
+
         # Remove the namespace
         if self._created:
             try:
@@ -131,7 +157,87 @@ class NamespaceNode(GenericNode):
             # Flip flag to indicate that the namespace is no longer created
             self._created = False
 
-    def add_interface(self, name: str, mac: Optional[str] = None, ips: Optional[Union[str, List[str]]] = None) -> None:
+    def _release_namespace(self) -> bool:
+        """Kill any processes left in the namespace, clean it up and return it to the pool, returning False if it could not be."""
+
+        try:
+            result = self.run_check_call(["/usr/bin/ip", "netns", "pids", self.namespace])
+        except subprocess.CalledProcessError as err:  # pragma: no cover
+            raise NsNetSimError(f"Failed to get processes in network namespace '{self.namespace}': {err.stdout}") from None
+
+        # Kill each process and wait for it to exit, so it doesn't interfere with the next user of the namespace
+        for pid in result.stdout.split():
+            try:
+                pidfd = os.pidfd_open(int(pid))
+            except ProcessLookupError:  # pragma: no cover
+                continue
+            try:
+                with contextlib.suppress(ProcessLookupError):
+                    signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                poller = select.poll()
+                poller.register(pidfd, select.POLLIN)
+                poller.poll(2000)
+            finally:
+                os.close(pidfd)
+
+        # Clean up what was left behind so the next user of the namespace starts with a clean one, if we can't the namespace is
+        # removed instead
+        try:
+            self._reset_namespace()
+        except NsNetSimError as err:  # pragma: no cover
+            self._log_warning(f"Not reusing network namespace '{self.namespace}': {err}")
+            return False
+
+        if self._namespace_pool:
+            self._namespace_pool.put(self.namespace)
+        # Switch to a new name, the one we had is now in the pool and can be handed to another node
+        self._namespace = str(uuid.uuid4())
+
+        return True
+
+    def _reset_namespace(self) -> None:
+        """
+        Reset the namespace to the state of a newly created one.
+
+        Links other than lo are removed, lo's addresses are flushed and it is taken down, routing tables and policy routing rules
+        are flushed and the rules a new namespace has are added back. lo gets its loopback addresses and routes back when it is
+        brought up again. If 'nft' is installed the nftables ruleset is flushed, which includes rules added using iptables-nft.
+        Rules added using iptables-legacy are not reset, as that needs a run of each legacy tool for each table and these tools
+        are deprecated in favour of nftables. Sysctls are not reset either, other than those set when the node is created.
+        """
+
+        batch = []
+        removed_links: Set[str] = set()
+        for link in self.run_ip(["link", "show"]) or []:
+            # Removing one end of a veth pair removes the other end too, so skip links whose peer we've already removed
+            if link["ifname"] == "lo" or link.get("link") in removed_links:
+                continue
+            batch.append(f"link del {link['ifname']}")
+            removed_links.add(link["ifname"])
+        batch.extend(["link set lo down", "address flush dev lo", "route flush table all", "route flush root ::/0 table all"])
+        batch.extend(["rule flush", "rule add priority 32766 lookup main", "rule add priority 32767 lookup default"])
+        # The IPv6 rules need their own run, as the address family can't be set per command in a batch
+        batch_ipv6 = ["rule flush", "rule add priority 32766 lookup main"]
+        try:
+            self.run_check_call(["/usr/bin/ip", "-netns", self.namespace, "-batch", "-"], input="\n".join(batch) + "\n")
+            self.run_check_call(["/usr/bin/ip", "-netns", self.namespace, "-6", "-batch", "-"], input="\n".join(batch_ipv6) + "\n")
+        except subprocess.CalledProcessError as err:  # pragma: no cover
+            raise NsNetSimError(f"Failed to clean up network namespace '{self.namespace}': {err.stdout}") from None
+
+        nft = shutil.which("nft")
+        if nft:  # pragma: no cover
+            try:
+                self.run_in_ns_check_call([nft, "flush", "ruleset"])
+            except subprocess.CalledProcessError as err:
+                raise NsNetSimError(f"Failed to flush nftables in network namespace '{self.namespace}': {err.stdout}") from None
+
+    def add_interface(
+        self,
+        name: str,
+        mac: Optional[str] = None,
+        ips: Optional[Union[str, List[str]]] = None,
+        ipv6_dad_initial_delay: Optional[float] = None,
+    ) -> None:
         """
         Add network interface to namespace.
 
@@ -143,6 +249,8 @@ class NamespaceNode(GenericNode):
             Optional MAC address to add, else it will be randomly generated.
         ips : Optional[Union[str, list]]
             Optinal IP's to add to the interface, either one, or a list of many.
+        ipv6_dad_initial_delay : Optional[float]
+            Optional initial delay in seconds between checks for IPv6 DAD to complete, this doubles on each check up to 0.1s.
 
         """
 
@@ -151,7 +259,10 @@ class NamespaceNode(GenericNode):
             raise NsNetSimError(f"Interface name '{name}' already exists'")
 
         # Create interface
-        interface = NamespaceNetworkInterface(name=name, namespace_node=self, mac=mac)
+        interface_kwargs: Dict[str, Any] = {}
+        if ipv6_dad_initial_delay is not None:
+            interface_kwargs["ipv6_dad_initial_delay"] = ipv6_dad_initial_delay
+        interface = NamespaceNetworkInterface(name=name, namespace_node=self, mac=mac, **interface_kwargs)
 
         # Add to our internal structure
         self._interfaces[name] = interface
@@ -178,6 +289,10 @@ class NamespaceNode(GenericNode):
         """Add route to the namespace."""
         self._routes.append(route)
 
+    def add_routes(self, routes: List[List[str]]) -> None:
+        """Add multiple routes to the namespace."""
+        self._routes.extend(routes)
+
     def run_in_ns_check_call(self, args: List[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
         """Run command inside the namespace similar to check_call."""
         return self._run_in_ns(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, **kwargs)
@@ -190,16 +305,23 @@ class NamespaceNode(GenericNode):
         """Run command inside the namespace similar to check_call."""
         return self._run_in_ns_popen(args, **kwargs)
 
+    def list_routes(self, family: int) -> List[Dict[str, Any]]:
+        """Return the main routing table for an address family, eg. socket.AF_INET, in the same format as run_ip() returns."""
+        try:
+            return netlink_list_routes(self.namespace, family)
+        except (NetlinkError, ValueError) as err:  # pragma: no cover
+            raise NsNetSimError(f"Failed to list routes in network namespace '{self.namespace}': {err}") from None
+
     def run_ip(self, args: List[str]) -> Any:
         """Run the 'ip' tool and decode its return output."""
-        # Run the IP tool with JSON output
-        cmd_args = ["/usr/bin/ip", "--json"]
+        # Run the IP tool with JSON output, it can switch into the namespace itself so we don't need 'ip netns exec'
+        cmd_args = ["/usr/bin/ip", "-netns", self.namespace, "--json"]
         # Add our args
         cmd_args.extend(args)
 
         # Grab result from process execution
         try:
-            result = self.run_in_ns_check_call(cmd_args)
+            result = self.run_check_call(cmd_args)
         except subprocess.CalledProcessError as err:  # pragma: no cover
             raise NsNetSimError(f"Failed to run '{cmd_args}' in '{self.namespace}': {err.stdout}") from None
 
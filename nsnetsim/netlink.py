@@ -0,0 +1,272 @@
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# Copyright (C) 2019-2024, AllWorldIT.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Netlink support."""
+
+import socket
+import threading
+from typing import Any, Dict, List, Optional
+
+from pyroute2 import IPRoute, NetlinkError
+from pyroute2.netlink import NLM_F_ACK, NLM_F_CREATE, NLM_F_ECHO, NLM_F_EXCL, NLM_F_REQUEST
+from pyroute2.netlink.rtnl import RTM_NEWLINK
+from pyroute2.netlink.rtnl.ifinfmsg import IFF_UP, ifinfmsg
+from pyroute2.netlink.rtnl.rtmsg import rtmsg
+
+from .netns import NetNS
+
+__all__ = [
+    "NetlinkError",
+    "get_ipr",
+    "link_add",
+    "link_add_msg",
+    "link_del",
+    "link_set_msg",
+    "list_routes",
+    "request_batch",
+]
+
+# Host netlink route socket, this is opened on first use and shared so we don't need to open a socket for each request
+_IPR: Optional[IPRoute] = None
+# Lock serializing access to the shared socket, so requests from different threads don't get their responses mixed up
+_IPR_LOCK = threading.RLock()
+
+# Main routing table, which is what 'ip route list' shows by default
+RT_TABLE_MAIN = 254
+# Route type and protocol 'ip' assumes when they're not shown
+RTN_UNICAST = 1
+RTPROT_BOOT = 3
+# Route metric feature bit for ECN
+RTAX_FEATURE_ECN = 1
+
+# Names used by 'ip' for route types, protocols, scopes, flags and IPv6 preferences, values not listed are output as numbers
+_ROUTE_TYPES = {
+    0: "unspec",
+    1: "unicast",
+    2: "local",
+    3: "broadcast",
+    4: "anycast",
+    5: "multicast",
+    6: "blackhole",
+    7: "unreachable",
+    8: "prohibit",
+    9: "throw",
+    10: "nat",
+    11: "xresolve",
+}
+_ROUTE_PROTOCOLS = {
+    0: "unspec",
+    1: "redirect",
+    2: "kernel",
+    3: "boot",
+    4: "static",
+    8: "gated",
+    9: "ra",
+    10: "mrt",
+    11: "zebra",
+    12: "bird",
+    13: "dnrouted",
+    14: "xorp",
+    15: "ntk",
+    16: "dhcp",
+    18: "keepalived",
+    42: "babel",
+    186: "bgp",
+    187: "isis",
+    188: "ospf",
+    189: "rip",
+    192: "eigrp",
+}
+_ROUTE_SCOPES = {0: "global", 200: "site", 253: "link", 254: "host", 255: "nowhere"}
+_ROUTE_FLAGS = {1: "dead", 2: "pervasive", 4: "onlink", 8: "offload", 16: "linkdown", 32: "unresolved", 64: "trap"}
+_ROUTE_PREFS = {0: "medium", 1: "high", 3: "low"}
+# Route metrics 'ip' scales from the kernel value, the rest are output as is
+_ROUTE_METRIC_SCALES = {"RTAX_RTT": 8, "RTAX_RTTVAR": 4}
+
+# Maximum number of messages we send in a single batch, link messages are small so this keeps each write well under 16KiB
+BATCH_SIZE = 256
+
+
+def get_ipr() -> IPRoute:
+    """Return the shared host netlink route socket, opening it on first use."""
+    global _IPR  # pylint: disable=global-statement
+    with _IPR_LOCK:
+        if _IPR is None:
+            _IPR = IPRoute()
+        return _IPR
+
+
+def link_add_msg(ifname: str, kind: str, up: bool = False, **info_data: Any) -> ifinfmsg:
+    """Return a RTM_NEWLINK message creating an interface of a given kind, eg. kind="bridge" with BR_FORWARD_DELAY=0."""
+    msg = ifinfmsg()
+    # Bring the interface up as part of creating it
+    if up:
+        msg["flags"] = IFF_UP
+        msg["change"] = IFF_UP
+    info_data_attrs = [(f"IFLA_{name}", value) for name, value in info_data.items()]
+    linkinfo = [("IFLA_INFO_KIND", kind), ("IFLA_INFO_DATA", {"attrs": info_data_attrs})]
+    msg["attrs"] = [("IFLA_IFNAME", ifname), ("IFLA_LINKINFO", {"attrs": linkinfo})]
+    msg["header"]["type"] = RTM_NEWLINK
+    # Ask the kernel to echo the new interface back to us, so we get its index without another request
+    msg["header"]["flags"] = NLM_F_REQUEST | NLM_F_ACK | NLM_F_CREATE | NLM_F_EXCL | NLM_F_ECHO
+    return msg
+
+
+def link_add(msg: ifinfmsg) -> int:
+    """Send a message created by link_add_msg() and return the interface index of the new interface."""
+    # Consume the responses while holding the lock, so they can't be mixed up with those of another request
+    with _IPR_LOCK:
+        responses = list(get_ipr().nlm_request_batch([msg]))
+    for response in responses:
+        if response["header"]["type"] == RTM_NEWLINK:
+            return int(response["index"])
+    raise NetlinkError(0, "No interface returned when adding link")  # pragma: no cover
+
+
+def link_del(index: int) -> None:
+    """Remove an interface."""
+    with _IPR_LOCK:
+        get_ipr().link("del", index=index)
+
+
+def link_set_msg(index: int, **attrs: Any) -> ifinfmsg:
+    """Return a RTM_NEWLINK message changing the link attributes of an existing interface, eg. IFLA_MASTER=1."""
+    msg = ifinfmsg()
+    msg["index"] = index
+    msg["attrs"] = [(f"IFLA_{name}", value) for name, value in attrs.items()]
+    msg["header"]["type"] = RTM_NEWLINK
+    msg["header"]["flags"] = NLM_F_REQUEST | NLM_F_ACK
+    return msg
+
+
+def list_routes(namespace: str, family: int) -> List[Dict[str, Any]]:
+    """
+    Return the main routing table of a namespace for an address family, in the same format as 'ip --json route list'.
+
+    Routes are output with the attributes nsnetsim sets up and what the kernel adds to them, including metrics and multipath
+    nexthops. Less common attributes are not output, these are encapsulation, nexthop objects, multipath 'via' addresses and the
+    'congestion' and 'fastopen_no_cookie' metrics.
+    """
+    # Open a netlink socket inside the namespace, the socket stays bound to the namespace after we switch back
+    with NetNS(nsname=namespace):
+        ipr = IPRoute()
+    try:
+        ifnames = {link["index"]: link.get_attr("IFLA_IFNAME") for link in ipr.link("dump")}
+        return [
+            _route_to_ip_json(route, ifnames)
+            for route in ipr.route("dump", family=family)
+            if route.get_attr("RTA_TABLE") == RT_TABLE_MAIN
+        ]
+    finally:
+        ipr.close()
+
+
+def _route_to_ip_json(route: rtmsg, ifnames: Dict[int, str]) -> Dict[str, Any]:  # pylint: disable=too-many-branches
+    """Convert a route message into the dict 'ip --json route list' outputs for it, only showing non-default values like 'ip'."""
+    result: Dict[str, Any] = {}
+
+    if route["type"] != RTN_UNICAST:
+        result["type"] = _ROUTE_TYPES.get(route["type"], f"{route['type']}")
+
+    # The destination is "default" for a zero length prefix, and has no length for host routes
+    dst_len = route["dst_len"]
+    if not dst_len:
+        result["dst"] = "default"
+    elif dst_len == (32 if route["family"] == socket.AF_INET else 128):
+        result["dst"] = route.get_attr("RTA_DST")
+    else:
+        result["dst"] = f"{route.get_attr('RTA_DST')}/{dst_len}"
+
+    gateway = route.get_attr("RTA_GATEWAY")
+    if gateway is not None:
+        result["gateway"] = gateway
+    oif = route.get_attr("RTA_OIF")
+    if oif is not None:
+        result["dev"] = ifnames.get(oif, f"if{oif}")
+    if route["proto"] != RTPROT_BOOT:
+        result["protocol"] = _ROUTE_PROTOCOLS.get(route["proto"], f"{route['proto']}")
+    if route["scope"]:
+        result["scope"] = _ROUTE_SCOPES.get(route["scope"], f"{route['scope']}")
+    metric = route.get_attr("RTA_PRIORITY")
+    if metric is not None:
+        result["metric"] = metric
+    prefsrc = route.get_attr("RTA_PREFSRC")
+    if prefsrc is not None:
+        result["prefsrc"] = prefsrc
+    result["flags"] = _route_flags(route["flags"])
+    metrics = route.get_attr("RTA_METRICS")
+    if metrics:
+        result["metrics"] = [_route_metrics_to_ip_json(metrics)]
+    pref = route.get_attr("RTA_PREF")
+    if pref is not None:
+        result["pref"] = _ROUTE_PREFS.get(pref, f"{pref}")
+    nexthops = route.get_attr("RTA_MULTIPATH")
+    if nexthops:
+        result["nexthops"] = [_route_nexthop_to_ip_json(nexthop, ifnames) for nexthop in nexthops]
+
+    return result
+
+
+def _route_flags(flags: int) -> List[str]:
+    """Return the names 'ip' uses for route or nexthop flags."""
+    return [name for flag, name in _ROUTE_FLAGS.items() if flags & flag]
+
+
+def _route_metrics_to_ip_json(metrics: Any) -> Dict[str, Any]:
+    """Convert route metrics into the dict 'ip --json route list' outputs for them."""
+    result: Dict[str, Any] = {}
+
+    for attr, value in metrics["attrs"]:
+        # 'ip' only shows locks in its text output, and pyroute2 doesn't decode the newer metrics
+        if attr in ("RTAX_LOCK", "UNKNOWN"):
+            continue
+        if attr == "RTAX_FEATURES":
+            if value & RTAX_FEATURE_ECN:
+                result["ecn"] = None
+            if value & ~RTAX_FEATURE_ECN:
+                result["features"] = f"{value:#x}"
+            continue
+        if attr in _ROUTE_METRIC_SCALES:
+            value //= _ROUTE_METRIC_SCALES[attr]
+        result[attr.removeprefix("RTAX_").lower()] = value
+
+    return result
+
+
+def _route_nexthop_to_ip_json(nexthop: Any, ifnames: Dict[int, str]) -> Dict[str, Any]:
+    """Convert a multipath route nexthop into the dict 'ip --json route list' outputs for it."""
+    result: Dict[str, Any] = {}
+
+    gateway = nexthop.get_attr("RTA_GATEWAY")
+    if gateway is not None:
+        result["gateway"] = gateway
+    result["dev"] = ifnames.get(nexthop["oif"], f"if{nexthop['oif']}")
+    # The kernel stores the weight less one
+    result["weight"] = nexthop["hops"] + 1
+    result["flags"] = _route_flags(nexthop["flags"])
+
+    return result
+
+
+def request_batch(msgs: List[ifinfmsg]) -> None:
+    """Send netlink messages in batches, each batch is sent using a single write and all acks are then read back."""
+    with _IPR_LOCK:
+        for start in range(0, len(msgs), BATCH_SIZE):
+            end = start + BATCH_SIZE
+            # Read back all the acks for this batch, any failure is raised as a NetlinkError
+            list(get_ipr().nlm_request_batch(msgs[start:end]))
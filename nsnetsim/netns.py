@@ -23,11 +23,15 @@
 
 import ctypes
 import ctypes.util
+import logging
 import os
-from io import BufferedReader
+import queue
+import subprocess  # nosec
+import threading
+import uuid
 from typing import IO, Any, Optional, Union
 
-__all__ = ["NetNS"]
+__all__ = ["NetNS", "NamespacePool"]
 
 #
 # Python doesn't expose the setns function, so we need to load it ourselves.
@@ -38,6 +42,9 @@ __all__ = ["NetNS"]
 CLONE_NEWNET = 0x40000000
 
 libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+# Declare the setns signature so ctypes doesn't need to work out the argument types on each call
+libc.setns.argtypes = [ctypes.c_int, ctypes.c_int]
+libc.setns.restype = ctypes.c_int
 
 #
 # End of importing of setns
@@ -53,9 +60,9 @@ def setns(handle: Union[IO[Any], int], nstype: int) -> int:
     numeric file  descriptor or a Python object with a fileno() method.
     """
 
-    if isinstance(handle, int):  # pragma: no cover
+    if isinstance(handle, int):
         filefd = handle
-    elif hasattr(handle, "fileno"):
+    elif hasattr(handle, "fileno"):  # pragma: no cover
         filefd = handle.fileno()
     else:  # pragma: no cover
         raise TypeError("The 'handle' parameter must either be a file object or file descriptor")
@@ -75,7 +82,8 @@ def get_ns_path(nspath: Optional[str] = None, nsname: Optional[str] = None, nspi
 
     Generate a filesystem path from a namespace name or pid, and return
     a filesystem path to the appropriate file.  Returns the nspath argument
-    if both nsname and nspid are None.
+    if both nsname and nspid are None.  The path is not checked for
+    existence.
     """
 
     if nsname:
@@ -83,8 +91,9 @@ def get_ns_path(nspath: Optional[str] = None, nsname: Optional[str] = None, nspi
     elif nspid:
         nspath = f"/proc/{nspid}/ns/net"
 
-    if (not nspath) or (not os.path.exists(nspath)):  # pragma: no cover
-        raise ValueError(f"Namespace path '{nspath}' does not exist")
+    # We don't check if the path exists here, opening it will fail if it doesn't
+    if not nspath:  # pragma: no cover
+        raise ValueError("Namespace path, name or pid must be specified")
 
     return nspath
 
@@ -93,31 +102,120 @@ class NetNS:
     """
     A context manager for running code inside a network namespace.
 
-    This is a context manager that on enter assigns the current process
+    This is a context manager that on enter assigns the current thread
     to an alternate network namespace (specified by name, filesystem path,
-    or pid) and then re-assigns the process to its original network
+    or pid) and then re-assigns the thread to its original network
     namespace on exit.
     """
 
     _mypath: str
     _target_path: str
-    # Our namespace handle
-    _myns: BufferedReader
+    # Target namespace file descriptor, kept open so we can enter the namespace multiple times
+    _target_fd: int
+    # Our namespace file descriptor
+    _myns_fd: int
 
     def __init__(self, nsname: Optional[str] = None, nspath: Optional[str] = "", nspid: Optional[int] = None) -> None:
         """Initialize object."""
-        # Grab paths
-        self._mypath = get_ns_path(nspid=os.getpid())
+        self._target_fd = -1
+        # Grab paths, setns() only affects the calling thread, so we need to save the namespace of the thread and not the process
+        self._mypath = get_ns_path(nspath="/proc/thread-self/ns/net")
         self._target_path = get_ns_path(nspath=nspath, nsname=nsname, nspid=nspid)
+        # Open the target namespace once
+        try:
+            self._target_fd = os.open(self._target_path, os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:  # pragma: no cover
+            raise ValueError(f"Namespace path '{self._target_path}' does not exist") from None
+
+    def __del__(self) -> None:
+        """Close the target namespace file descriptor when we're garbage collected."""
+        self.close()
 
     def __enter__(self) -> None:
         """Enter the namespace using with NetNS(...)."""
         # Save our current namespace, so we can jump back during __exit__
-        self._myns = open(self._mypath, "rb")  # noqa: SIM115
-        with open(self._target_path, "rb") as filefd:
-            setns(filefd, CLONE_NEWNET)
+        self._myns_fd = os.open(self._mypath, os.O_RDONLY | os.O_CLOEXEC)
+        setns(self._target_fd, CLONE_NEWNET)
 
     def __exit__(self, *args: Any) -> None:
         """Exit the namespace."""
-        setns(self._myns, CLONE_NEWNET)
-        self._myns.close()
+        setns(self._myns_fd, CLONE_NEWNET)
+        os.close(self._myns_fd)
+
+    def close(self) -> None:
+        """Close the target namespace file descriptor."""
+        if self._target_fd >= 0:
+            os.close(self._target_fd)
+            self._target_fd = -1
+
+
+class NamespacePool:
+    """
+    A pool of pre-created network namespaces.
+
+    Creating a network namespace is slow, so this pool can create them in a background thread ahead of time. Nodes given the pool
+    will grab a ready namespace from it instead of creating their own, and when removed will return their namespace to the pool
+    so it can be reused.
+    """
+
+    # Namespaces ready for use
+    _namespaces: "queue.Queue[str]"
+    # Background thread creating namespaces
+    _thread: Optional[threading.Thread]
+
+    def __init__(self) -> None:
+        """Initialize object."""
+        self._namespaces = queue.Queue()
+        self._thread = None
+
+    def prewarm(self, count: int) -> None:
+        """Create a number of namespaces in the background."""
+        self._thread = threading.Thread(target=self._prewarm, args=(count,), daemon=True)
+        self._thread.start()
+
+    def get(self) -> Optional[str]:
+        """Return a ready namespace name or None if there are none available."""
+        try:
+            return self._namespaces.get_nowait()
+        except queue.Empty:
+            return None
+
+    def put(self, namespace: str) -> None:
+        """Return a namespace to the pool so it can be reused."""
+        self._namespaces.put(namespace)
+
+    def close(self) -> None:
+        """Remove all namespaces in the pool."""
+        # Wait for the background thread to finish so we don't miss any namespaces
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        # Remove the namespaces we have left
+        while (namespace := self.get()) is not None:
+            try:
+                subprocess.run(  # nosec
+                    ["/usr/bin/ip", "netns", "del", namespace],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    check=True,
+                    text=True,
+                )
+            except subprocess.CalledProcessError as err:  # pragma: no cover
+                logging.warning("Failed to remove pooled network namespace '%s': %s", namespace, err.stdout)
+
+    def _prewarm(self, count: int) -> None:
+        """Create namespaces and add them to the pool."""
+        for _ in range(count):
+            namespace = str(uuid.uuid4())
+            try:
+                subprocess.run(  # nosec
+                    ["/usr/bin/ip", "netns", "add", namespace],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    check=True,
+                    text=True,
+                )
+            except subprocess.CalledProcessError as err:  # pragma: no cover
+                logging.warning("Failed to pre-create network namespace '%s': %s", namespace, err.stdout)
+                return
+            self._namespaces.put(namespace)
@@ -18,6 +18,8 @@
 
 """Router node support."""
 
+from typing import ClassVar
+
 from .namespace_node import NamespaceNode
 
 __all__ = ["RouterNode"]
@@ -25,3 +27,5 @@ __all__ = ["RouterNode"]
 
 class RouterNode(NamespaceNode):
     """RouterNode implements a network isolated router node."""
+
+    NODE_KIND: ClassVar[str] = "router"
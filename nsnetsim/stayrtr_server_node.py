@@ -21,10 +21,11 @@
 import datetime
 import json
 import os
+import select
 import shutil
 import signal
 import subprocess  # nosec: B404
-from typing import Any, Dict, List, Optional
+from typing import Any, ClassVar, Dict, List, Optional, TextIO
 
 from .exceptions import NsNetSimError
 from .router_node import RouterNode
@@ -35,6 +36,8 @@ __all__ = ["StayRTRServerNode"]
 class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attributes
     """StayRTRServerNode implements a network isolated StayRTR server node."""
 
+    # Path to the StayRTR binary, this is shared by all instances so we only search PATH once
+    _stayrtr_bin: ClassVar[str] = ""
     # Cache file
     _cache: str
     # SLURM file
@@ -43,6 +46,8 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
     _pidfile: str
     # Log file
     _logfile: Optional[str]
+    # Log file handle given to the process
+    _logfile_f: Optional[TextIO]
     # SSH key
     _ssh_key_file: Optional[str]
     # SSH authorized keys
@@ -56,10 +61,12 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
     def _init(self, **kwargs: Any) -> None:
         """Initialize the object."""
         # Call parent create
-        super()._init()
+        super()._init(**kwargs)
 
         # Make sure stayrtr path is returned by which
-        if not shutil.which("stayrtr"):
+        if not StayRTRServerNode._stayrtr_bin:
+            StayRTRServerNode._stayrtr_bin = shutil.which("stayrtr") or ""
+        if not StayRTRServerNode._stayrtr_bin:
             raise NsNetSimError("StayRTR binary not found in PATH")
 
         # Check if we were provided a cache
@@ -71,8 +78,11 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
                 "metadata": {"buildtime": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"), "vrps": 0},
                 "roas": [],
             }
-            with open(cache, "w", encoding="UTF-8") as cache_file:
-                cache_file.write(json.dumps(cache_data))
+            cache_fd = os.open(cache, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(cache_fd, json.dumps(cache_data, separators=(",", ":")).encode("UTF-8"))
+            finally:
+                os.close(cache_fd)
         # Set cache to use
         self._cache = cache
 
@@ -101,6 +111,7 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
         self._args = kwargs.get("args", [])
 
         self._process = None
+        self._logfile_f = None
 
     def _create(self) -> None:
         """Create the server."""
@@ -108,7 +119,7 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
         # Call parent create
         super()._create()
 
-        args = ["stayrtr", "-cache", self._cache]
+        args = [self._stayrtr_bin, "-cache", self._cache]
         if self._slurmfile:
             args.extend(["-slurm", self._slurmfile])
         if self._ssh_key_file:
@@ -125,9 +136,9 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
         if not logfile:
             logfile = "/dev/null"
 
-        # Start StayRTR process using subprocess.Popen
-        logfile_f = open(logfile, "w", encoding="UTF-8")  # noqa: SIM115 # pylint: disable=consider-using-with
-        self._process = self.run_in_ns_popen(args, env=environment, stdout=logfile_f, stderr=subprocess.STDOUT)
+        # Start StayRTR process using subprocess.Popen, we keep the log file handle so we can close it when we're removed
+        self._logfile_f = open(logfile, "w", encoding="UTF-8")  # noqa: SIM115 # pylint: disable=consider-using-with
+        self._process = self.run_in_ns_popen(args, env=environment, stdout=self._logfile_f, stderr=subprocess.STDOUT)
 
         # Write out PID file
         with open(self._pidfile, "w", encoding="UTF-8") as f:
@@ -138,13 +149,35 @@ class StayRTRServerNode(RouterNode):  # pylint: disable=too-many-instance-attrib
 
         # Kill process
         if self._process:
+            # Grab a pidfd so we can wait for the process to exit without polling, this needs Linux 5.3 or newer
+            try:
+                pidfd: Optional[int] = os.pidfd_open(self._process.pid)
+            except (AttributeError, OSError):  # pragma: no cover
+                pidfd = None
             # Try terminate
             self._process.terminate()
-            try:
-                self._process.wait(timeout=2)
-            # If that doesn't work, force kill the entire group
-            except subprocess.TimeoutExpired:
-                os.killpg(os.getpgid(self._process.pid), signal.SIGTERM)
+            if pidfd is not None:
+                try:
+                    poller = select.poll()
+                    poller.register(pidfd, select.POLLIN)
+                    # Reap the process if it exited, else force kill the entire group
+                    if poller.poll(2000):
+                        self._process.wait()
+                    else:  # pragma: no cover
+                        os.killpg(os.getpgid(self._process.pid), signal.SIGTERM)
+                finally:
+                    os.close(pidfd)
+            else:  # pragma: no cover
+                try:
+                    self._process.wait(timeout=2)
+                # If that doesn't work, force kill the entire group
+                except subprocess.TimeoutExpired:
+                    os.killpg(os.getpgid(self._process.pid), signal.SIGTERM)
+
+        # Close the log file
+        if self._logfile_f:
+            self._logfile_f.close()
+            self._logfile_f = None
 
         # Call parent remove
         super()._remove()
@@ -18,24 +18,33 @@
 
 """Switch node support."""
 
+import itertools
 import secrets
-import subprocess  # nosec
-from typing import Any, List
+from typing import Any, ClassVar, Dict, List
 
 from .exceptions import NsNetSimError
 from .generic_node import GenericNode
 from .namespace_network_interface import NamespaceNetworkInterface
+from .netlink import NetlinkError, link_add, link_add_msg, link_del, link_set_msg, request_batch
 
 __all__ = ["SwitchNode"]
 
+# Bridge names are made up of a random per-process suffix and a counter, so we don't need to get random data for each switch
+_BR_SUFFIX = secrets.token_hex(3)
+_BR_COUNTER = itertools.count()
+
 
 class SwitchNode(GenericNode):
     """Switch implements a basic switch support for nsnetsim."""
 
+    NODE_KIND: ClassVar[str] = "switch"
+
     # Name of the bridge we've created
     _bridge_name: str
-    # Interfaces added to this switch
-    _interfaces: List[NamespaceNetworkInterface]
+    # Interface index of the bridge we've created
+    _bridge_ifindex: int
+    # Interfaces added to this switch, indexed by host interface name
+    _interfaces: Dict[str, NamespaceNetworkInterface]
     # Created flag
     _created: bool
 
@@ -46,10 +55,11 @@ class SwitchNode(GenericNode):
         # name = kwargs.get("name")
 
         # Set the bridge name we're going to use
-        self._bridge_name = f"br-{secrets.token_hex(5)}"
+        self._bridge_name = f"br-{_BR_SUFFIX}{next(_BR_COUNTER):04x}"
+        self._bridge_ifindex = 0
 
-        # Start out with no interfaces added to this switch\
-        self._interfaces = []
+        # Start out with no interfaces added to this switch
+        self._interfaces = {}
 
         # Indicator that the bridge interface was created
         self._created = False
@@ -57,44 +67,61 @@ class SwitchNode(GenericNode):
     def _create(self) -> None:
         """Create the switch."""
 
+        # Create the bridge and bring it up using a single netlink message, the kernel echoes back the bridge interface index which
+        # we need below
         try:
-            self.run_check_call(["/usr/bin/ip", "link", "add", self.bridge_name, "type", "bridge", "forward_delay", "0"])
-        except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f"Failed to add bridge '{self.bridge_name}' to host: {err.stdout}") from None
+            self._bridge_ifindex = link_add(link_add_msg(self.bridge_name, "bridge", up=True, BR_FORWARD_DELAY=0))
+        except NetlinkError as err:  # pragma: no cover
+            raise NsNetSimError(f"Failed to add bridge '{self.bridge_name}' to host: {err}") from None
         # Indicate that the bridge was created
         self._created = True
 
-        try:
-            self.run_check_call(["/usr/bin/ip", "link", "set", self.bridge_name, "up"])
-        except subprocess.CalledProcessError as err:  # pragma: no cover
-            raise NsNetSimError(f"Failed to set bridge '{self.bridge_name}' up: {err.stdout}") from None
-
         # Add interfaces to the bridge by setting the bridge as the interface master
-        for interface in self.interfaces:
-            self._log(f"Adding interface '{interface.name}' from '{interface.namespace_node.name}' to switch '{self.name}'")
-            try:
-                self.run_check_call(["/usr/bin/ip", "link", "set", interface.ifname_host, "master", self.bridge_name])
-            except subprocess.CalledProcessError as err:  # pragma: no cover
-                raise NsNetSimError(
-                    f"Failed to set master for '{interface.ifname_host}' to '{self.bridge_name}': {err.stdout}"
-                ) from None
+        ifindexes = []
+        switch_name = self.name
+        for interface in self._interfaces.values():
+            interface_name = interface.name
+            node_name = interface.namespace_node.name
+            host_ifindex = interface.host_ifindex
+            self._log(f"Adding interface '{interface_name}' from '{node_name}' to switch '{switch_name}'")
+            # The interface index is only known once the interface is created
+            if not host_ifindex:  # pragma: no cover
+                raise NsNetSimError(f"Interface '{interface_name}' from '{node_name}' has not been created")
+            ifindexes.append(host_ifindex)
+        self._attach_interfaces_batch(ifindexes)
 
     def _remove(self) -> None:
         """Remove the namespace."""
 
         if self._created:
             try:
-                self.run_check_call(["/usr/bin/ip", "link", "del", self.bridge_name])
-            except subprocess.CalledProcessError as err:  # pragma: no cover
-                raise NsNetSimError(f"Failed to remove host bridge '{self.bridge_name}': {err.stdout}") from None
+                link_del(self._bridge_ifindex)
+            except NetlinkError as err:  # pragma: no cover
+                raise NsNetSimError(f"Failed to remove host bridge '{self.bridge_name}': {err}") from None
             # Flip flag to indicate that the bridge is no longer created
             self._created = False
 
+    def _attach_interfaces_batch(self, ifindexes: List[int]) -> None:
+        """Set the bridge as the master of a list of interfaces, using a single netlink batch."""
+        try:
+            request_batch([link_set_msg(ifindex, MASTER=self._bridge_ifindex) for ifindex in ifindexes])
+        except NetlinkError as err:  # pragma: no cover
+            raise NsNetSimError(f"Failed to add interfaces to bridge '{self.bridge_name}': {err}") from None
+
     def add_interface(self, interface: NamespaceNetworkInterface) -> None:
         """Add an interface to this switch."""
 
-        # Add an interface to the list we have of interfaces
-        self._interfaces.append(interface)
+        # Adding the same interface again is a no-op, but a different interface with the same host-side name is an error
+        existing = self._interfaces.get(interface.ifname_host)
+        if existing is interface:
+            return
+        if existing:
+            raise NsNetSimError(
+                f"Interface '{interface.name}' from '{interface.namespace_node.name}' already added to switch '{self.name}'"
+            )
+
+        # Add an interface to the interfaces we have
+        self._interfaces[interface.ifname_host] = interface
 
     @property
     def bridge_name(self) -> str:
@@ -104,4 +131,4 @@ class SwitchNode(GenericNode):
     @property
     def interfaces(self) -> List[NamespaceNetworkInterface]:
         """Return the interfaces linked to this switch."""
-        return self._interfaces
+        return list(self._interfaces.values())
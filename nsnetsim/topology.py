@@ -18,8 +18,11 @@
 
 """Topology support."""
 
+import concurrent.futures
+import contextlib
+import functools
 import logging
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from .exceptions import NsNetSimError
 from .generic_node import GenericNode
@@ -28,6 +31,8 @@ from .switch_node import SwitchNode
 
 __all__ = ["Topology"]
 
+_log = logging.getLogger(__name__)
+
 
 class Topology:
     """Topology implements the high level simulation setup."""
@@ -36,6 +41,8 @@ class Topology:
     _nodes: List[GenericNode]
     # Switches by name
     _nodes_by_name: Dict[str, GenericNode]
+    # Nodes grouped by their kind
+    _nodes_by_kind: Dict[str, List[GenericNode]]
 
     def __init__(self) -> None:
         """Initialize the object."""
@@ -43,13 +50,13 @@ class Topology:
         # Clear the lists of nodes we have
         self._nodes = []
         self._nodes_by_name = {}
+        self._nodes_by_kind = {}
 
     def add_node(self, node: GenericNode) -> None:
         """Add a router to our topology."""
 
-        node_type = type(node).__name__
-
-        logging.info("Adding node: [%s] %s", node_type, node.name)
+        if _log.isEnabledFor(logging.INFO):
+            _log.info("Adding node: [%s] %s", type(node).__name__, node.name)
 
         # Check if router exists.. if so throw an error
         if node.name in self._nodes_by_name:
@@ -58,40 +65,80 @@ class Topology:
         self._nodes_by_name[node.name] = node
         self._nodes.append(node)
 
+        # Group nodes by kind, as we create and remove routers and switches at different stages
+        self._nodes_by_kind.setdefault(node.NODE_KIND, []).append(node)
+
     def run(self) -> None:
         """Build our simulated network."""
 
-        logging.info("Build and run a topology")
+        _log.info("Build and run a topology")
         try:
-            # We need to create routers first, so they're up before we plug them into switches
-            for node in self._nodes:
-                if isinstance(node, RouterNode):
-                    node.create()
+            # We need to create routers first, so they're up before we plug them into switches, they are independent of each other
+            # so we create them concurrently
+            self._run_concurrently([router.create for router in self._nodes_by_kind.get(RouterNode.NODE_KIND, [])])
             # Then switches
-            for node in self._nodes:
-                if isinstance(node, SwitchNode):
-                    node.create()
+            for switch in self._nodes_by_kind.get(SwitchNode.NODE_KIND, []):
+                switch.create()
         except NsNetSimError as err:
-            logging.error("Simulation error: %s", err)
-            self.destroy()
+            _log.error("Simulation error: %s", err)
+            # Any errors during cleanup are logged by destroy(), we want to raise the original error
+            with contextlib.suppress(NsNetSimError):
+                self.destroy()
             raise NsNetSimError(f"Simulation error: {err}") from None
 
     def destroy(self) -> None:
         """Destroy our simulated network."""
 
-        logging.info("Destroying topology")
-        # We need to remove routers first
-        for node in self._nodes:
-            if isinstance(node, RouterNode):
-                node.remove()
+        _log.info("Destroying topology")
+        # We carry on removing nodes when one fails so we don't leak the rest, errors are collected and raised at the end
+        errors: List[Exception] = []
+        # We need to remove routers first, which we do concurrently
+        routers = self._nodes_by_kind.get(RouterNode.NODE_KIND, [])
+        self._run_concurrently([functools.partial(self._remove_node, router, errors) for router in routers])
         # Then switches
-        for node in self._nodes:
-            if isinstance(node, SwitchNode):
-                node.remove()
+        for switch in self._nodes_by_kind.get(SwitchNode.NODE_KIND, []):
+            self._remove_node(switch, errors)
+
+        if errors:
+            raise NsNetSimError(f"Failed to destroy topology: {'; '.join(str(error) for error in errors)}")
 
     def node(self, name: str) -> Optional[GenericNode]:
-        """Return a node with a given name."""
-        if name in self._nodes_by_name:
-            return self._nodes_by_name[name]
-        # Or None if not found
-        return None
+        """Return a node with a given name or None if not found."""
+        return self._nodes_by_name.get(name)
+
+    def router(self, name: str) -> RouterNode:
+        """Return a router with a given name."""
+        node = self._nodes_by_name.get(name)
+        if not isinstance(node, RouterNode):
+            raise NsNetSimError(f'Router node "{name}" not found')
+        return node
+
+    def switch(self, name: str) -> SwitchNode:
+        """Return a switch with a given name."""
+        node = self._nodes_by_name.get(name)
+        if not isinstance(node, SwitchNode):
+            raise NsNetSimError(f'Switch node "{name}" not found')
+        return node
+
+    def __getitem__(self, name: str) -> GenericNode:
+        """Return a node with a given name, raising a KeyError if not found."""
+        return self._nodes_by_name[name]
+
+    def _remove_node(self, node: GenericNode, errors: List[Exception]) -> None:
+        """Remove a node, logging and adding any error to a list instead of raising it."""
+        try:
+            node.remove()
+        # Catch everything, so one node failing in an unexpected way doesn't stop the rest of the topology being removed
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            _log.error("Failed to remove node '%s': %s", node.name, err)
+            errors.append(err)
+
+    def _run_concurrently(self, calls: List[Callable[[], None]]) -> None:
+        """Run calls concurrently in a thread pool, re-raising the first exception we get."""
+        if not calls:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(calls))) as executor:
+            futures = [executor.submit(call) for call in calls]
+        # Re-raise the first exception we got
+        for future in futures:
+            future.result()
@@ -18,125 +18,91 @@
 
 """Tests for BIRD."""
 
+import functools
 import re
 import time
-from typing import Any
+from typing import Any, Callable, Tuple, TypeVar
+
+import pytest
 
 from nsnetsim.bird_router_node import BirdRouterNode
-from nsnetsim.switch_node import SwitchNode
-from nsnetsim.topology import Topology
 
 __all__ = ["TestBirdRouterNode"]
 
 
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str, flags: int) -> "re.Pattern[str]":
+    """Compile a regex, caching the result so each pattern is only compiled once."""
+    return re.compile(pattern, flags)
+
+
 class CustomPytestRegex:
     """Assert that a given string meets some expectations."""
 
-    _pattern: str
+    __slots__ = ("_regex",)
+
+    _regex: "re.Pattern[str]"
 
     def __init__(self, pattern: str, flags: int = 0) -> None:
         """Inititalize object."""
-        self._pattern = pattern
-        self._regex = re.compile(pattern, flags)
+        self._regex = _compile(pattern, flags)
 
     def __eq__(self, actual: Any) -> bool:
         """Check if the 'actual' string matches the regex."""
-        print(f"COMPARE: {self._pattern}")
-        print(f"COMPARE: {actual}")
-        return bool(self._regex.match(actual))
+        return self._regex.match(actual) is not None
 
     def __repr__(self) -> Any:
         """Return our representation."""
         return self._regex.pattern
 
 
-class TestBirdRouterNode:
-    """Test the BirdRouterNode class."""
+_T = TypeVar("_T")
 
-    def test_basic_config(self) -> None:
-        """Test one router with a configuration file."""
 
-        topology = Topology()
+def _wait_for(fetch: Callable[[], _T], condition: Callable[[_T], bool], timeout: float = 10.0, interval: float = 0.1) -> _T:
+    """Fetch a value until it meets a condition and return it, raising a RuntimeError if it doesn't within the timeout."""
+    deadline = time.monotonic() + timeout
+    while not condition(value := fetch()):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Timed out after {timeout}s waiting for condition")
+        time.sleep(interval)
+    return value
 
-        # Add router
-        topology.add_node(BirdRouterNode("r1", configfile="tests/bird_router_node/r1.conf"))
-        node_r1 = topology.node("r1")
-        if not isinstance(node_r1, BirdRouterNode):
-            raise RuntimeError("Node r1 not found")
-        node_r1.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
-        node_r1_iface = node_r1.interface("eth0")
-        if not node_r1_iface:
-            raise RuntimeError("Interface eth0 not found")
 
-        # Add switch
-        topology.add_node(SwitchNode("s1"))
-        node_s1 = topology.node("s1")
-        if not isinstance(node_s1, SwitchNode):
-            raise RuntimeError("Node s1 not found")
-        node_s1.add_interface(node_r1_iface)
+# Expected BIRD symbol output patterns, compiled once for all tests
+_BIRD_READY = CustomPytestRegex(r"0001 BIRD [0-9\.]+ ready.")
+_MASTER_TABLE = CustomPytestRegex(r"(?:1010-| )?master[46] \trouting table")
+# Expected output of "show symbols table" on routerX
+_ROUTERX_SYMBOLS_EXPECTED = [_BIRD_READY, _MASTER_TABLE, _MASTER_TABLE, "0000 "]
 
-        topology.run()
 
-        status_output = node_r1.birdc_show_status()
+@pytest.mark.xdist_group(name="bird")
+class TestBirdRouterNode:
+    """Test the BirdRouterNode class."""
+
+    def test_basic_config(self, warm_bird_router: BirdRouterNode) -> None:
+        """Test one router with a configuration file."""
 
-        topology.destroy()
+        status_output = warm_bird_router.birdc_show_status()
 
         assert "router_id" in status_output, 'The status output should have "router_id"'
         assert status_output["router_id"] == "192.168.0.1", 'The router ID should be "192.168.0.1"'
 
-    def test_rip(self) -> None:  # pylint: disable=too-many-statements
+    def test_rip(self, warm_bird_rip_pair: Tuple[BirdRouterNode, BirdRouterNode]) -> None:
         """Test a two router setup with RIP."""
 
-        topology = Topology()
-
-        # Add router r1
-        topology.add_node(BirdRouterNode("r1", configfile="tests/bird_router_node/r1.conf"))
-        node_r1 = topology.node("r1")
-        if not isinstance(node_r1, BirdRouterNode):
-            raise RuntimeError("Node r1 not found")
-        # Add interfaces
-        node_r1.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
-        node_r1_eth0 = node_r1.interface("eth0")
-        if not node_r1_eth0:
-            raise RuntimeError("Interface eth0 not found")
-        node_r1.add_interface("eth1", mac="02:01:01:00:00:01", ips=["192.168.10.1/24", "fec0:10::1/64"])
-        node_r1_eth1 = node_r1.interface("eth1")
-        if not node_r1_eth1:
-            raise RuntimeError("Interface eth1 not found")
-
-        # Add router r2
-        topology.add_node(BirdRouterNode("r2", configfile="tests/bird_router_node/r2.conf"))
-        node_r2 = topology.node("r2")
-        if not isinstance(node_r2, BirdRouterNode):
-            raise RuntimeError("Node r2 not found")
-        # Add interface
-        node_r2.add_interface("eth0", mac="02:02:00:00:00:01", ips=["192.168.0.2/24", "fec0::2/64"])
-        node_r2_eth0 = node_r2.interface("eth0")
-        if not node_r2_eth0:
-            raise RuntimeError("Interface eth0 not found")
-
-        # Add switch
-        topology.add_node(SwitchNode("s1"))
-        node_s1 = topology.node("s1")
-        if not isinstance(node_s1, SwitchNode):
-            raise RuntimeError("Node s1 not found")
-
-        node_s1.add_interface(node_r1_eth0)
-        node_s1.add_interface(node_r2_eth0)
-
-        topology.run()
-
-        try:
-            routerx_protocols_output = node_r1.birdc_show_protocols()
-            routery_protocols_output = node_r2.birdc_show_protocols()
-
-            time.sleep(10)
-            routerx_master4_output = node_r1.birdc_show_route_table("master4")
-            routery_master4_output = node_r2.birdc_show_route_table("master4")
-
-            routerx_symbols_output = node_r1.birdc("show symbols table")
-        finally:
-            topology.destroy()
+        node_r1, node_r2 = warm_bird_rip_pair
+
+        routerx_protocols_output = node_r1.birdc_show_protocols()
+        routery_protocols_output = node_r2.birdc_show_protocols()
+
+        # Wait for RIP to converge, which is when routerY has learned the route from routerX
+        routery_master4_output = _wait_for(
+            lambda: node_r2.birdc_show_route_table("master4"), lambda table: "192.168.10.0/24" in table
+        )
+        routerx_master4_output = node_r1.birdc_show_route_table("master4")
+
+        routerx_symbols_output = node_r1.birdc("show symbols table")
 
         assert "rip4" in routerx_protocols_output, 'The "rip4" protocol should be in the protocols output'
         assert "rip6" in routerx_protocols_output, 'The "rip6" protocol should be in the protocols output'
@@ -164,10 +130,4 @@ class TestBirdRouterNode:
             {"gateway": "192.168.0.1", "interface": "eth0"}
         ], 'The "gateway" should be "192.168.0.1"'
 
-        routerx_protocol_expected = [
-            CustomPytestRegex(r"0001 BIRD [0-9\.]+ ready."),
-            CustomPytestRegex(r"(?:1010-| )?master[46] \trouting table"),
-            CustomPytestRegex(r"(?:1010-| )?master[46] \trouting table"),
-            "0000 ",
-        ]
-        assert routerx_symbols_output == routerx_protocol_expected, "Protocol output does not match what it should"
+        assert routerx_symbols_output == _ROUTERX_SYMBOLS_EXPECTED, "Protocol output does not match what it should"
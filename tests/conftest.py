@@ -0,0 +1,151 @@
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# Copyright (C) 2019-2024, AllWorldIT.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Shared test fixtures."""
+
+# pytest passes fixtures as arguments named after the fixture functions
+# pylint: disable=redefined-outer-name
+
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from nsnetsim.bird_router_node import BirdRouterNode
+from nsnetsim.exabgp_router_node import ExaBGPRouterNode
+from nsnetsim.netns import NamespacePool
+from nsnetsim.router_node import RouterNode
+from nsnetsim.stayrtr_server_node import StayRTRServerNode
+from nsnetsim.switch_node import SwitchNode
+from nsnetsim.topology import Topology
+
+__all__ = [
+    "namespace_pool",
+    "router_basic_topology",
+    "bird_rip_topology",
+    "warm_bird_router",
+    "warm_bird_rip_pair",
+    "exabgp_basic_topology",
+    "stayrtr_basic_topology",
+]
+
+
+@pytest.fixture(scope="session")
+def namespace_pool() -> Iterator[NamespacePool]:
+    """Return a pool of network namespaces which are reused by all tests instead of being created and removed for each test."""
+    pool = NamespacePool()
+    pool.prewarm(4)
+    yield pool
+    pool.close()
+
+
+def _run_topology(topology: Topology) -> Iterator[Topology]:
+    """Run a topology, yield it and destroy it afterwards."""
+    topology.run()
+    try:
+        yield topology
+    finally:
+        topology.destroy()
+
+
+def _add_switch(topology: Topology, name: str, routers: List[RouterNode]) -> None:
+    """Add a switch to a topology and plug the routers 'eth0' interfaces into it."""
+    switch = SwitchNode(name)
+    topology.add_node(switch)
+    for router in routers:
+        interface = router.interface("eth0")
+        if not interface:
+            raise RuntimeError(f"Interface eth0 not found on {router.name}")
+        switch.add_interface(interface)
+
+
+@pytest.fixture(scope="session")
+def router_basic_topology(namespace_pool: NamespacePool) -> Iterator[Topology]:
+    """Return a running topology with a basic namespace router 'r1' plugged into switch 's1'."""
+    topology = Topology()
+
+    router = RouterNode("r1", namespace_pool=namespace_pool)
+    topology.add_node(router)
+    router.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
+    router.add_routes([["192.168.90.0/24", "via", "192.168.0.2"], ["fec0:10::/64", "via", "fec0::2"]])
+
+    _add_switch(topology, "s1", [router])
+
+    yield from _run_topology(topology)
+
+
+@pytest.fixture(scope="session")
+def bird_rip_topology(namespace_pool: NamespacePool) -> Iterator[Topology]:
+    """Return a running topology with BIRD routers 'r1' and 'r2' running RIP over switch 's1'."""
+    topology = Topology()
+
+    router1 = BirdRouterNode("r1", configfile="tests/bird_router_node/r1.conf", namespace_pool=namespace_pool)
+    topology.add_node(router1)
+    router1.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
+    router1.add_interface("eth1", mac="02:01:01:00:00:01", ips=["192.168.10.1/24", "fec0:10::1/64"])
+
+    router2 = BirdRouterNode("r2", configfile="tests/bird_router_node/r2.conf", namespace_pool=namespace_pool)
+    topology.add_node(router2)
+    router2.add_interface("eth0", mac="02:02:00:00:00:01", ips=["192.168.0.2/24", "fec0::2/64"])
+
+    _add_switch(topology, "s1", [router1, router2])
+
+    yield from _run_topology(topology)
+
+
+@pytest.fixture(scope="session")
+def warm_bird_rip_pair(bird_rip_topology: Topology) -> Tuple[BirdRouterNode, BirdRouterNode]:
+    """Return the running BIRD routers 'r1' and 'r2' from the RIP topology."""
+    router1 = bird_rip_topology.router("r1")
+    router2 = bird_rip_topology.router("r2")
+    if not isinstance(router1, BirdRouterNode) or not isinstance(router2, BirdRouterNode):
+        raise RuntimeError("Nodes r1 and r2 should be BIRD routers")
+    return router1, router2
+
+
+@pytest.fixture(scope="session")
+def warm_bird_router(warm_bird_rip_pair: Tuple[BirdRouterNode, BirdRouterNode]) -> BirdRouterNode:
+    """Return a running BIRD router, this is 'r1' from the RIP topology so we don't need to start another BIRD."""
+    return warm_bird_rip_pair[0]
+
+
+@pytest.fixture(scope="session")
+def exabgp_basic_topology(namespace_pool: NamespacePool) -> Iterator[Topology]:
+    """Return a running topology with ExaBGP router 'r1' plugged into switch 's1'."""
+    topology = Topology()
+
+    router = ExaBGPRouterNode("r1", configfile="tests/exabgp_router_node/r1.conf", namespace_pool=namespace_pool)
+    topology.add_node(router)
+    router.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
+
+    _add_switch(topology, "s1", [router])
+
+    yield from _run_topology(topology)
+
+
+@pytest.fixture(scope="session")
+def stayrtr_basic_topology(namespace_pool: NamespacePool) -> Iterator[Topology]:
+    """Return a running topology with StayRTR server 'r1' plugged into switch 's1'."""
+    topology = Topology()
+
+    router = StayRTRServerNode("r1", configfile="tests/stayrtr_server_node/a1.conf", namespace_pool=namespace_pool)
+    topology.add_node(router)
+    router.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
+
+    _add_switch(topology, "s1", [router])
+
+    yield from _run_topology(topology)
@@ -19,38 +19,19 @@
 """Tests for ExaBGP."""
 
 
+import pytest
+
 from nsnetsim.exabgp_router_node import ExaBGPRouterNode
-from nsnetsim.switch_node import SwitchNode
 from nsnetsim.topology import Topology
 
 __all__ = ["TestExaBGPRouterNode"]
 
 
+@pytest.mark.xdist_group(name="exabgp")
 class TestExaBGPRouterNode:  # pylint: disable=too-few-public-methods
     """Test the ExaBGPRouterNode class."""
 
-    def test_basic_config(self) -> None:
+    def test_basic_config(self, exabgp_basic_topology: Topology) -> None:
         """Test one router with a configuration file."""
 
-        topology = Topology()
-
-        # Add node
-        topology.add_node(ExaBGPRouterNode("r1", configfile="tests/exabgp_router_node/r1.conf"))
-        node_r1 = topology.node("r1")
-        if not isinstance(node_r1, ExaBGPRouterNode):
-            raise RuntimeError("Node r1 not found")
-        # Add interface
-        node_r1.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
-        node_r1_iface = node_r1.interface("eth0")
-        if not node_r1_iface:
-            raise RuntimeError("Interface eth0 not found")
-
-        # Add switch
-        topology.add_node(SwitchNode("s1"))
-        node_s1 = topology.node("s1")
-        if not isinstance(node_s1, SwitchNode):
-            raise RuntimeError("Node s1 not found")
-        node_s1.add_interface(node_r1_iface)
-
-        topology.run()
-        topology.destroy()
+        assert isinstance(exabgp_basic_topology.router("r1"), ExaBGPRouterNode), "Node r1 should be an ExaBGP router"
@@ -19,38 +19,19 @@
 """Tests for StayRTR."""
 
 
+import pytest
+
 from nsnetsim.stayrtr_server_node import StayRTRServerNode
-from nsnetsim.switch_node import SwitchNode
 from nsnetsim.topology import Topology
 
 __all__ = ["TestStayRTRServerNode"]
 
 
+@pytest.mark.xdist_group(name="stayrtr")
 class TestStayRTRServerNode:  # pylint: disable=too-few-public-methods
     """Test the StayRTRServerNode class."""
 
-    def test_basic_config(self) -> None:
+    def test_basic_config(self, stayrtr_basic_topology: Topology) -> None:
         """Test one router with a configuration file."""
 
-        topology = Topology()
-
-        # Add node
-        topology.add_node(StayRTRServerNode("r1", configfile="tests/stayrtr_server_node/a1.conf"))
-        node_r1 = topology.node("r1")
-        if not isinstance(node_r1, StayRTRServerNode):
-            raise RuntimeError("Node r1 not found")
-        # Add interface
-        node_r1.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
-        node_r1_iface = node_r1.interface("eth0")
-        if not node_r1_iface:
-            raise RuntimeError("Interface eth0 not found")
-
-        # Add switch
-        topology.add_node(SwitchNode("s1"))
-        node_s1 = topology.node("s1")
-        if not isinstance(node_s1, SwitchNode):
-            raise RuntimeError("Node s1 not found")
-        node_s1.add_interface(node_r1_iface)
-
-        topology.run()
-        topology.destroy()
+        assert isinstance(stayrtr_basic_topology.router("r1"), StayRTRServerNode), "Node r1 should be a StayRTR server"
@@ -18,7 +18,15 @@
 
 """Tests for BIRD."""
 
+import signal
+import socket
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
+import pytest
+
+from nsnetsim.exceptions import NsNetSimError
+from nsnetsim.generic_node import GenericNode
+from nsnetsim.netns import NamespacePool
 from nsnetsim.router_node import RouterNode
 from nsnetsim.switch_node import SwitchNode
 from nsnetsim.topology import Topology
@@ -26,57 +34,175 @@ from nsnetsim.topology import Topology
 __all__ = ["TestRouterNode"]
 
 
-class TestRouterNode:  # pylint: disable=too-few-public-methods
+def _freeze(value: Any) -> Any:
+    """Return a value with any dicts and lists in it converted so it can be hashed."""
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _as_set(routes: List[Dict[str, Any]]) -> Set[FrozenSet[Tuple[str, Any]]]:
+    """Return routes as a set so they can be compared without depending on the order the kernel returns them in."""
+    return {_freeze(route) for route in routes}
+
+
+# Routes we expect on r1 in the basic router topology
+_CORRECT_ROUTES_V4 = _as_set(
+    [
+        {"dst": "192.168.0.0/24", "dev": "eth0", "protocol": "kernel", "scope": "link", "prefsrc": "192.168.0.1", "flags": []},
+        {"dst": "192.168.90.0/24", "gateway": "192.168.0.2", "dev": "eth0", "flags": []},
+    ]
+)
+_CORRECT_ROUTES_V6 = _as_set(
+    [
+        {"dst": "fe80::/64", "dev": "eth0", "protocol": "kernel", "metric": 256, "pref": "medium", "flags": []},
+        {"dst": "fec0::/64", "dev": "eth0", "protocol": "kernel", "metric": 256, "pref": "medium", "flags": []},
+        {"dst": "fec0:10::/64", "gateway": "fec0::2", "dev": "eth0", "metric": 1024, "pref": "medium", "flags": []},
+    ]
+)
+
+
+@pytest.mark.xdist_group(name="router")
+class TestRouterNode:
     """Test the BirdNode class."""
 
-    def test_basic(self) -> None:
+    def test_basic(self, router_basic_topology: Topology) -> None:
         """Test a basic namespace router."""
 
-        topology = Topology()
+        node_r1 = router_basic_topology.router("r1")
 
-        # Router
-        topology.add_node(RouterNode("r1"))
-        node_r1 = topology.node("r1")
+        result_routes_v4 = node_r1.list_routes(socket.AF_INET)
+        result_routes_v6 = node_r1.list_routes(socket.AF_INET6)
 
-        if not isinstance(node_r1, RouterNode):
-            raise RuntimeError("Node r1 not found")
-        node_r1.add_interface("eth0", mac="02:01:00:00:00:01", ips=["192.168.0.1/24", "fec0::1/64"])
-        node_r1.add_route(["192.168.90.0/24", "via", "192.168.0.2"])
-        node_r1.add_route(["fec0:10::/64", "via", "fec0::2"])
-        # Grab interface
-        node_r1_iface = node_r1.interface("eth0")
-        if not node_r1_iface:
-            raise RuntimeError("Interface eth0 not found")
+        #
+        # Routing tests
+        #
 
-        # Switch
-        topology.add_node(SwitchNode("s1"))
-        node_s1 = topology.node("s1")
+        assert _as_set(result_routes_v4) == _CORRECT_ROUTES_V4, "Routing table for IPv4 does not match expected value"
+        assert _as_set(result_routes_v6) == _CORRECT_ROUTES_V6, "Routing table for IPv6 does not match expected value"
 
-        if not isinstance(node_s1, SwitchNode):
-            raise RuntimeError("Node s1 not found")
-        node_s1.add_interface(node_r1_iface)
+    def test_list_routes_metrics_multipath(self) -> None:
+        """Test routes with metrics and multiple nexthops are listed like 'ip' lists them."""
 
-        topology.run()
+        node_r1 = RouterNode("r1")
+        node_r1.add_interface("eth0", ips=["192.168.0.1/24", "fec0::1/64"])
+        node_r1.add_interface("eth1", ips=["192.168.1.1/24", "fec0:1::1/64"])
+        node_r1.add_route(["192.168.90.0/24", "via", "192.168.0.2", "mtu", "1400", "rtt", "100ms", "features", "ecn"])
+        node_r1.add_route(["192.168.91.0/24", "nexthop", "via", "192.168.0.2", "nexthop", "via", "192.168.1.2", "weight", "3"])
+        node_r1.add_route(["fec0:90::/64", "via", "fec0::2", "mtu", "lock", "1300"])
+        node_r1.add_route(["fec0:91::/64", "nexthop", "via", "fec0::2", "nexthop", "via", "fec0:1::2"])
+        node_r1.create()
+        try:
+            for family, ip_family in ((socket.AF_INET, "inet"), (socket.AF_INET6, "inet6")):
+                result_routes = node_r1.list_routes(family)
+                assert any("metrics" in route for route in result_routes), "A route should have metrics"
+                assert any("nexthops" in route for route in result_routes), "A route should have nexthops"
+                assert _as_set(result_routes) == _as_set(
+                    node_r1.run_ip(["--family", ip_family, "route", "list"])
+                ), f"Routes for {ip_family} do not match 'ip'"
+        finally:
+            node_r1.remove()
 
+    def test_ipv6_dad_initial_delay(self) -> None:
+        """Test setting the initial delay between IPv6 DAD checks on an interface."""
+
+        node_r1 = RouterNode("r1")
+        node_r1.add_interface("eth0", ipv6_dad_initial_delay=0.05)
+        node_r1_eth0 = node_r1.interface("eth0")
+        if not node_r1_eth0:
+            raise RuntimeError("Interface eth0 not found")
+        assert node_r1_eth0.ipv6_dad_initial_delay == 0.05, "The IPv6 DAD initial delay should be passed to the interface"
+
+        with pytest.raises(NsNetSimError, match="IPv6 DAD initial delay must be greater than 0, got 0.0"):
+            node_r1.add_interface("eth1", ipv6_dad_initial_delay=0)
+
+    def test_switch_add_interface(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test adding interfaces to a switch."""
+
+        node_r1 = RouterNode("r1")
+        node_r1.add_interface("eth0")
+        node_r1.add_interface("eth1")
+        node_r1_eth0 = node_r1.interface("eth0")
+        node_r1_eth1 = node_r1.interface("eth1")
+        if not node_r1_eth0 or not node_r1_eth1:
+            raise RuntimeError("Interfaces eth0 and eth1 not found")
+        node_s1 = SwitchNode("s1")
+
+        # Adding the same interface again should not add it twice
+        node_s1.add_interface(node_r1_eth0)
+        node_s1.add_interface(node_r1_eth0)
+        assert node_s1.interfaces == [node_r1_eth0], "The switch should only have one interface"
+
+        # Adding a different interface with the same host-side name should fail
+        monkeypatch.setattr(node_r1_eth1, "_ifname_host", node_r1_eth0.ifname_host)
+        with pytest.raises(NsNetSimError, match="Interface 'eth1' from 'r1' already added to switch 's1'"):
+            node_s1.add_interface(node_r1_eth1)
+        assert node_s1.interfaces == [node_r1_eth0], "The switch should only have one interface"
+
+    @pytest.mark.parametrize("lookup", ["node", "getitem", "router"])
+    def test_lookup(self, router_basic_topology: Topology, lookup: str) -> None:
+        """Test looking up a router in a topology."""
+
+        node_r1: Optional[GenericNode]
+        if lookup == "node":
+            node_r1 = router_basic_topology.node("r1")
+        elif lookup == "getitem":
+            node_r1 = router_basic_topology["r1"]
+        else:
+            node_r1 = router_basic_topology.router("r1")
+
+        assert isinstance(node_r1, RouterNode), "Node r1 should be a router"
+        assert node_r1.name == "r1", 'The router name should be "r1"'
+
+    def test_route_error(self) -> None:
+        """Test a route that fails to be added is named in the error."""
+
+        node_r1 = RouterNode("r1")
+        node_r1.add_route(["blackhole", "10.0.0.0/8"])
+        node_r1.add_route(["blackhole", "10.0.0.0/8"])
         try:
-            result_routes_v4 = node_r1.run_ip(["--family", "inet", "route", "list"])
-            result_routes_v6 = node_r1.run_ip(["--family", "inet6", "route", "list"])
+            with pytest.raises(NsNetSimError, match=r"Failed to run 'ip route add blackhole 10\.0\.0\.0/8' in namespace"):
+                node_r1.create()
         finally:
-            topology.destroy()
+            node_r1.remove()
 
-        #
-        # Routing tests
-        #
+    def test_namespace_pool_reuse(self) -> None:
+        """Test a namespace returned to a pool is cleaned up before it is reused."""
 
-        correct_routes_v4 = [
-            {"dst": "192.168.0.0/24", "dev": "eth0", "protocol": "kernel", "scope": "link", "prefsrc": "192.168.0.1", "flags": []},
-            {"dst": "192.168.90.0/24", "gateway": "192.168.0.2", "dev": "eth0", "flags": []},
-        ]
-        correct_routes_v6 = [
-            {"dst": "fe80::/64", "dev": "eth0", "protocol": "kernel", "metric": 256, "pref": "medium", "flags": []},
-            {"dst": "fec0::/64", "dev": "eth0", "protocol": "kernel", "metric": 256, "pref": "medium", "flags": []},
-            {"dst": "fec0:10::/64", "gateway": "fec0::2", "dev": "eth0", "metric": 1024, "pref": "medium", "flags": []},
-        ]
-
-        assert result_routes_v4 == correct_routes_v4, "Routing table for IPv4 does not match expected value"
-        assert result_routes_v6 == correct_routes_v6, "Routing table for IPv6 does not match expected value"
+        pool = NamespacePool()
+        try:
+            # Leave a process, a route, an address, a link and policy routing rules behind in the namespace
+            node_r1 = RouterNode("r1", namespace_pool=pool)
+            node_r1.add_interface("eth0", ips=["192.168.0.1/24"])
+            node_r1.add_route(["blackhole", "10.50.0.0/16"])
+            node_r1.create()
+            rules = {family: node_r1.run_ip([family, "rule", "show"]) for family in ("-4", "-6")}
+            process = node_r1.run_in_ns_popen(["sleep", "60"])
+            node_r1.run_ip(["address", "add", "10.9.9.9/32", "dev", "lo"])
+            node_r1.run_ip(["link", "add", "veth0", "type", "veth", "peer", "name", "veth1"])
+            node_r1.run_ip(["-4", "rule", "add", "from", "10.0.0.0/8", "lookup", "100", "priority", "100"])
+            node_r1.run_ip(["-6", "rule", "del", "priority", "32766"])
+            namespace = node_r1.namespace
+            node_r1.remove()
+            assert process.wait(timeout=5) == -signal.SIGKILL, "The process left in the namespace should have been killed"
+
+            # The next node gets the same namespace and should be able to add the same route again
+            node_r2 = RouterNode("r2", namespace_pool=pool)
+            node_r2.add_route(["blackhole", "10.50.0.0/16"])
+            node_r2.create()
+            try:
+                assert node_r2.namespace == namespace, "The namespace should have been reused from the pool"
+                assert [link["ifname"] for link in node_r2.run_ip(["link", "show"])] == ["lo"], "Only lo should be left"
+                lo_addresses = [addr["local"] for addr in node_r2.run_ip(["address", "show", "dev", "lo"])[0]["addr_info"]]
+                assert lo_addresses == ["127.0.0.1", "::1"], "Only the loopback addresses should be on lo"
+                for family, family_rules in rules.items():
+                    assert node_r2.run_ip([family, "rule", "show"]) == family_rules, f"The {family} rules should have been reset"
+                assert _as_set(node_r2.list_routes(socket.AF_INET)) == _as_set(
+                    [{"type": "blackhole", "dst": "10.50.0.0/16", "flags": []}]
+                ), "Only the new route should be in the routing table"
+            finally:
+                node_r2.remove()
+        finally:
+            pool.close()
@@ -0,0 +1,54 @@
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# Copyright (C) 2019-2024, AllWorldIT.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for topologies."""
+
+from typing import List
+
+import pytest
+
+from nsnetsim.exceptions import NsNetSimError
+from nsnetsim.router_node import RouterNode
+from nsnetsim.switch_node import SwitchNode
+from nsnetsim.topology import Topology
+
+__all__ = ["TestTopology"]
+
+
+class TestTopology:  # pylint: disable=too-few-public-methods
+    """Test the Topology class."""
+
+    def test_destroy_error(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test switches are still removed when removing a router fails in an unexpected way."""
+
+        removed: List[str] = []
+
+        def remove_router() -> None:
+            raise OSError("Router removal failed")
+
+        topology = Topology()
+        node_r1 = RouterNode("r1")
+        node_s1 = SwitchNode("s1")
+        topology.add_node(node_r1)
+        topology.add_node(node_s1)
+        monkeypatch.setattr(node_r1, "remove", remove_router)
+        monkeypatch.setattr(node_s1, "remove", lambda: removed.append("s1"))
+
+        with pytest.raises(NsNetSimError, match="Failed to destroy topology: Router removal failed"):
+            topology.destroy()
+        assert removed == ["s1"], "The switch should have been removed"